@@ -1,47 +1,160 @@
+import asyncio
+import hashlib
+import json
+import os
+
+import aiohttp
+import redis
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-# Target URL
-URL = "https://apply.tnpscexams.in/notification?app_id=UElZMDAwMDAwMQ=="
+# Notification page, parameterised by the TNPSC app_id
+BASE_URL = "https://apply.tnpscexams.in/notification"
+APP_ID = "UElZMDAwMDAwMQ=="
 
 # Headers to mimic a browser
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
 }
 
-# Request the page
-response = requests.get(URL, headers=HEADERS)
-if response.status_code != 200:
-    print(f"Error: Unable to access page. Status code {response.status_code}")
-    exit()
-
-# Parse the page
-soup = BeautifulSoup(response.content, "html.parser")
-
-# Find the table
-table = soup.find("table")
-
-# Extract rows
-rows = table.find_all("tr")[1:]  # Skip header
-
-notifications = []
-
-for row in rows:
-    cols = row.find_all("td")
-    if len(cols) >= 8:
-        notification = {
-            "notification_no": cols[0].text.strip(),
-            "notification_date": cols[1].text.strip(),
-            "post_name": cols[2].text.strip(),
-            "app_start": cols[3].text.strip(),
-            "app_end": cols[4].text.strip(),
-            "payment_last_date": cols[5].text.strip(),
-            "languages": cols[6].text.strip(),
-            "exam_date": cols[7].text.strip(),
-            "status": cols[8].text.strip() if len(cols) > 8 else "N/A"
-        }
-        notifications.append(notification)
-
-# Display results
-for job in notifications:
-    print(f"{job['notification_no']} | {job['post_name']} | Last Date: {job['app_end']} | Status: {job['status']}")
+# Only the notification table is needed, so skip building the rest of the DOM
+ONLY_TABLES = SoupStrainer("table")
+
+# (connect, read) timeouts in seconds
+TIMEOUT = (5, 30)
+
+# aiohttp equivalents for the async scanner
+ASYNC_TIMEOUT = aiohttp.ClientTimeout(sock_connect=5, sock_read=30)
+ASYNC_POOL_LIMIT = 8
+
+# Notifications change at most daily, so cache parsed results in Redis
+CACHE_TTL = 900
+CACHE = redis.Redis.from_url(os.environ.get("REDIS_URL", "redis://localhost:6379/0"))
+
+# Shared session so repeated fetches reuse the keep-alive connection
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=8,
+        max_retries=Retry(total=3, backoff_factor=0.3),
+    ),
+)
+
+
+def parse_notifications(content):
+    """Parse the notification table out of a page body."""
+    # Parse only the table nodes with the C-backed lxml parser
+    soup = BeautifulSoup(content, "lxml", parse_only=ONLY_TABLES)
+
+    # Find the table
+    table = soup.find("table")
+    if table is None:
+        return []
+
+    # Extract rows
+    rows = table.find_all("tr")[1:]  # Skip header
+
+    notifications = []
+
+    for row in rows:
+        cols = row.find_all("td")
+        if len(cols) >= 8:
+            notification = {
+                "notification_no": cols[0].text.strip(),
+                "notification_date": cols[1].text.strip(),
+                "post_name": cols[2].text.strip(),
+                "app_start": cols[3].text.strip(),
+                "app_end": cols[4].text.strip(),
+                "payment_last_date": cols[5].text.strip(),
+                "languages": cols[6].text.strip(),
+                "exam_date": cols[7].text.strip(),
+                "status": cols[8].text.strip() if len(cols) > 8 else "N/A"
+            }
+            notifications.append(notification)
+
+    return notifications
+
+
+def cache_key(app_id):
+    """Redis key for the parsed notifications of a single app_id."""
+    url = f"{BASE_URL}?app_id={app_id}"
+    return f"tnpsc:{hashlib.sha1(url.encode()).hexdigest()}:json"
+
+
+def get_cached(key):
+    """Return cached notifications for a key, or None on a miss."""
+    try:
+        cached = CACHE.get(key)
+    except redis.RedisError:
+        return None
+    return json.loads(cached) if cached is not None else None
+
+
+def set_cached(key, notifications):
+    """Cache parsed notifications; best effort, the scrape works without Redis."""
+    try:
+        CACHE.setex(key, CACHE_TTL, json.dumps(notifications))
+    except redis.RedisError:
+        pass
+
+
+def fetch_notifications(app_id, session=SESSION):
+    """Fetch and parse the notification table for a single app_id."""
+    key = cache_key(app_id)
+    cached = get_cached(key)
+    if cached is not None:
+        return cached
+
+    response = session.get(BASE_URL, params={"app_id": app_id}, timeout=TIMEOUT)
+    if response.status_code != 200:
+        print(f"Error: Unable to access page. Status code {response.status_code}")
+        return []
+
+    notifications = parse_notifications(response.content)
+    set_cached(key, notifications)
+    return notifications
+
+
+async def fetch_and_parse(app_id, session):
+    """Async variant of fetch_notifications for use inside an event loop.
+
+    The Redis lookups and the parse run in worker threads so they do not
+    block the loop while other fetches are in flight.
+    """
+    key = cache_key(app_id)
+    cached = await asyncio.to_thread(get_cached, key)
+    if cached is not None:
+        return cached
+
+    async with session.get(BASE_URL, params={"app_id": app_id}) as response:
+        if response.status != 200:
+            print(f"Error: Unable to access page. Status code {response.status}")
+            return []
+        body = await response.read()
+
+    notifications = await asyncio.to_thread(parse_notifications, body)
+    await asyncio.to_thread(set_cached, key, notifications)
+    return notifications
+
+
+async def fetch_many(app_ids):
+    """Fetch notifications for several app_ids concurrently over one pool."""
+    connector = aiohttp.TCPConnector(limit=ASYNC_POOL_LIMIT, keepalive_timeout=60)
+    async with aiohttp.ClientSession(
+        headers=HEADERS, connector=connector, timeout=ASYNC_TIMEOUT
+    ) as session:
+        results = await asyncio.gather(
+            *[fetch_and_parse(app_id, session) for app_id in app_ids]
+        )
+    return dict(zip(app_ids, results))
+
+
+if __name__ == "__main__":
+    # Display results
+    for job in fetch_notifications(APP_ID):
+        print(f"{job['notification_no']} | {job['post_name']} | Last Date: {job['app_end']} | Status: {job['status']}")
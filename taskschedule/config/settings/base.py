@@ -356,3 +356,13 @@ SPECTACULAR_SETTINGS = {
 }
 # Your stuff...
 # ------------------------------------------------------------------------------
+# Allow tasks with execution_mode="inproc" to run inside the Celery worker
+# process instead of a subprocess. This trades isolation for speed, so keep it
+# off unless every script author is trusted.
+TASKS_ALLOW_INPROC_EXECUTION = env.bool("TASKS_ALLOW_INPROC_EXECUTION", default=False)
+# Compiled task scripts are cached here, keyed by the hash of their source. The
+# directory must only be writable by the worker user.
+TASKS_BYTECODE_CACHE_DIR = env(
+    "TASKS_BYTECODE_CACHE_DIR",
+    default=str(BASE_DIR / ".cache" / "bytecode"),
+)
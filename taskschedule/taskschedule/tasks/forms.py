@@ -1,5 +1,6 @@
-import re
+from datetime import datetime
 
+from croniter import CroniterError, croniter
 from django import forms
 from django.core.exceptions import ValidationError
 
@@ -99,27 +100,16 @@ DEBUG=True'''
         return cleaned_data
 
     def _validate_cron_expression(self, cron_expr):
-        """Basic validation for cron expressions."""
-        parts = cron_expr.strip().split()
-        if len(parts) != 5:
+        """Validate a standard five-field cron expression."""
+        if len(cron_expr.split()) != 5:
             return False
 
-        # Basic regex patterns for each cron field
-        patterns = [
-            r'^(\*|[0-5]?\d)$',  # minute (0-59)
-            r'^(\*|[01]?\d|2[0-3])$',  # hour (0-23)
-            r'^(\*|[12]?\d|3[01])$',  # day of month (1-31)
-            r'^(\*|[01]?\d)$',  # month (1-12)
-            r'^(\*|[0-6])$',  # day of week (0-6)
-        ]
-
-        for i, part in enumerate(parts):
-            # Allow ranges, lists, and step values
-            if ',' in part or '-' in part or '/' in part:
-                continue
-            if not re.match(patterns[i], part):
-                return False
-
+        # Expressions like "0 0 31 2 *" parse but never fire, so make sure
+        # there is a next run time as well
+        try:
+            croniter(cron_expr).get_next(datetime)
+        except CroniterError:
+            return False
         return True
 
     def save(self, commit=True):
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.11 on 2026-10-15 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="taskdefinition",
+            name="running_runs",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
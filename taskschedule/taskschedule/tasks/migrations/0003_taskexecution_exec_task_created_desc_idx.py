@@ -0,0 +1,19 @@
+# Generated by Django 5.1.11 on 2026-10-15 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0002_taskdefinition_running_runs"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="taskexecution",
+            index=models.Index(
+                fields=["task", "-created_at"], name="exec_task_created_desc_idx"
+            ),
+        ),
+    ]
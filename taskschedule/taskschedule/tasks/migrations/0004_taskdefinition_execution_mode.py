@@ -0,0 +1,26 @@
+# Generated by Django 5.1.11 on 2026-10-15 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0003_taskexecution_exec_task_created_desc_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="taskdefinition",
+            name="execution_mode",
+            field=models.CharField(
+                choices=[
+                    ("subprocess", "Separate Process"),
+                    ("inproc", "In Worker Process"),
+                ],
+                default="subprocess",
+                help_text="Run in a separate process, or inside the worker with a shared HTTP session",
+                max_length=20,
+            ),
+        ),
+    ]
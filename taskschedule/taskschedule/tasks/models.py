@@ -1,13 +1,30 @@
 import os
 import uuid
+from functools import cached_property
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.validators import FileExtensionValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.utils import timezone
 
 User = get_user_model()
 
+# Dashboard statistics are cached per user for a short time
+DASHBOARD_STATS_TIMEOUT = 60
+
+
+def dashboard_stats_cache_key(user_id):
+    """Cache key for a user's dashboard statistics."""
+    return f'dash:{user_id}'
+
+
+def invalidate_dashboard_stats(user_id):
+    """Drop a user's cached dashboard statistics."""
+    cache.delete(dashboard_stats_cache_key(user_id))
+
 
 def upload_script_to(instance, filename):
     """Generate upload path for script files."""
@@ -29,6 +46,11 @@ class TaskDefinition(models.Model):
         ('cron', 'Cron Expression'),
     ]
 
+    EXECUTION_MODES = [
+        ('subprocess', 'Separate Process'),
+        ('inproc', 'In Worker Process'),
+    ]
+
     STATUS_CHOICES = [
         ('draft', 'Draft'),
         ('active', 'Active'),
@@ -79,6 +101,12 @@ class TaskDefinition(models.Model):
         default=3,
         help_text="Maximum number of retry attempts on failure"
     )
+    execution_mode = models.CharField(
+        max_length=20,
+        choices=EXECUTION_MODES,
+        default='subprocess',
+        help_text="Run in a separate process, or inside the worker with a shared HTTP session"
+    )
 
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
@@ -90,6 +118,7 @@ class TaskDefinition(models.Model):
     total_runs = models.PositiveIntegerField(default=0)
     successful_runs = models.PositiveIntegerField(default=0)
     failed_runs = models.PositiveIntegerField(default=0)
+    running_runs = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ['-created_at']
@@ -119,15 +148,28 @@ class TaskDefinition(models.Model):
                 pass
         return self.script_content or ""
 
-    def get_environment_dict(self):
-        """Parse environment variables into a dictionary."""
-        env_dict = {}
-        if self.environment_variables:
-            for line in self.environment_variables.strip().split('\n'):
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    env_dict[key.strip()] = value.strip()
-        return env_dict
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Drop the parsed environment so it is rebuilt from the saved value
+        self.__dict__.pop('environment_dict', None)
+        invalidate_dashboard_stats(self.user_id)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_dashboard_stats(self.user_id)
+        return result
+
+    @cached_property
+    def environment_dict(self):
+        """Parse environment variables into a dictionary, once per instance."""
+        if not self.environment_variables:
+            return {}
+        return {
+            key.strip(): value.strip()
+            for line in self.environment_variables.splitlines()
+            for key, sep, value in (line.partition('='),)
+            if sep
+        }
 
 
 class TaskExecution(models.Model):
@@ -170,11 +212,16 @@ class TaskExecution(models.Model):
             models.Index(fields=['task', 'status']),
             models.Index(fields=['status', 'created_at']),
             models.Index(fields=['celery_task_id']),
+            models.Index(fields=['task', '-created_at'], name='exec_task_created_desc_idx'),
         ]
 
     def __str__(self):
         return f"{self.task.name} - {self.created_at.strftime('%Y-%m-%d %H:%M:%S')} ({self.status})"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate_dashboard_stats(self.task.user_id)
+
     @property
     def duration(self):
         """Calculate execution duration if both start and end times are available."""
@@ -186,10 +233,18 @@ class TaskExecution(models.Model):
         """Mark the execution as started."""
         self.status = 'running'
         self.started_at = timezone.now()
-        self.save(update_fields=['status', 'started_at'])
+        with transaction.atomic():
+            TaskExecution.objects.filter(pk=self.pk).update(
+                status=self.status, started_at=self.started_at
+            )
+            TaskDefinition.objects.filter(pk=self.task_id).update(
+                running_runs=F('running_runs') + 1
+            )
 
     def mark_completed(self, status, output='', error_output='', exit_code=None):
         """Mark the execution as completed with results."""
+        was_running = self.status == 'running'
+
         self.status = status
         self.completed_at = timezone.now()
         self.output = output
@@ -199,20 +254,31 @@ class TaskExecution(models.Model):
         if self.started_at:
             self.execution_time_seconds = (self.completed_at - self.started_at).total_seconds()
 
-        self.save(update_fields=[
-            'status', 'completed_at', 'output', 'error_output',
-            'exit_code', 'execution_time_seconds'
-        ])
-
-        # Update task statistics
-        self.task.total_runs += 1
-        self.task.last_run_at = self.completed_at
-
+        # Update task statistics in a single UPDATE; reconcile_running_counts
+        # may have reset running_runs already, so never take it below zero
+        stats = {
+            'total_runs': F('total_runs') + 1,
+            'last_run_at': self.completed_at,
+        }
         if status == 'success':
-            self.task.successful_runs += 1
+            stats['successful_runs'] = F('successful_runs') + 1
         else:
-            self.task.failed_runs += 1
-
-        self.task.save(update_fields=[
-            'total_runs', 'successful_runs', 'failed_runs', 'last_run_at'
-        ])
+            stats['failed_runs'] = F('failed_runs') + 1
+        if was_running:
+            stats['running_runs'] = Greatest(
+                F('running_runs') - 1, 0, output_field=models.PositiveIntegerField()
+            )
+
+        with transaction.atomic():
+            TaskExecution.objects.filter(pk=self.pk).update(
+                status=self.status,
+                completed_at=self.completed_at,
+                output=self.output,
+                error_output=self.error_output,
+                exit_code=self.exit_code,
+                execution_time_seconds=self.execution_time_seconds
+            )
+            TaskDefinition.objects.filter(pk=self.task_id).update(**stats)
+
+        # Plain updates skip save(), so drop the cached stats explicitly
+        invalidate_dashboard_stats(self.task.user_id)
@@ -1,12 +1,106 @@
+import codecs
+import contextlib
+import ctypes
+import hashlib
+import hmac
+import io
+import locale
+import marshal
 import os
+import selectors
 import subprocess
 import sys
 import tempfile
+import threading
+import time
+import traceback
+from pathlib import Path
+
+import requests
 
 from celery import shared_task
+from celery.utils import uuid
+from croniter import CroniterError, croniter
+from django.conf import settings
+from django.db import models
+from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Concat
 from django.utils import timezone
+from django.utils.crypto import salted_hmac
+from requests.adapters import HTTPAdapter
+
+from .models import TaskExecution, invalidate_dashboard_stats
+
+# How often (in seconds) streamed script output is appended to the execution
+OUTPUT_FLUSH_INTERVAL = 5
+
+# Number of old executions removed per DELETE by cleanup_old_executions
+CLEANUP_BATCH_SIZE = 1000
+
+# Default (connect, read) timeout for HTTP calls made by in-process scripts
+INPROC_HTTP_TIMEOUT = (5, 30)
+
+# How long to wait for an in-process script to unwind after its timeout
+INPROC_TIMEOUT_GRACE = 1
+
+
+# Runs a marshalled code object piped over stdin in the real __main__
+# namespace, as `python -` would, so functions and classes the script defines
+# can be pickled. The loader removes its own names before handing over.
+BYTECODE_LOADER = (
+    "import marshal, sys\n"
+    "sys.argv = ['-']\n"
+    "code = marshal.loads(sys.stdin.buffer.read())\n"
+    "del marshal, sys\n"
+    "exec(globals().pop('code'), globals())\n"
+)
 
-from .models import TaskExecution
+# Bytecode cache entries unused for this many days are pruned
+BYTECODE_CACHE_MAX_AGE_DAYS = 30
+
+
+class ScriptTimeout(BaseException):
+    """Raised inside an in-process script when it exceeds its timeout."""
+
+
+class AbandonedScript(subprocess.TimeoutExpired):
+    """An in-process script timed out and its thread could not be stopped."""
+
+
+# Script threads that outlived their timeout; while any is alive this process
+# must not run another in-process script
+_abandoned_threads = []
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connection pool is shared by every in-process run.
+
+    Each run gets its own requests.Session, so cookies, headers and auth never
+    leak between tasks, while connections are still reused through this
+    adapter. Requests without an explicit timeout get INPROC_HTTP_TIMEOUT so a
+    hung server cannot block the worker indefinitely.
+    """
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = INPROC_HTTP_TIMEOUT
+        return super().send(request, timeout=timeout, **kwargs)
+
+    def close(self):
+        # Sessions close their adapters; keep the shared pool alive for later runs
+        pass
+
+
+SHARED_HTTP_ADAPTER = PooledHTTPAdapter(pool_maxsize=32)
+
+
+def _make_inproc_session():
+    """Build a fresh session for one in-process run on the shared pool."""
+    session = requests.Session()
+    session.mount('http://', SHARED_HTTP_ADAPTER)
+    session.mount('https://', SHARED_HTTP_ADAPTER)
+    return session
 
 
 @shared_task(bind=True)
@@ -33,31 +127,36 @@ def execute_python_script(self, execution_id):
             raise ValueError("No script content found")
 
         # Get environment variables
-        env_vars = task.get_environment_dict()
-
-        # Create a temporary file for the script
-        with tempfile.NamedTemporaryFile(
-            mode='w',
-            suffix='.py',
-            delete=False
-        ) as script_file:
-            script_file.write(script_content)
-            script_path = script_file.name
+        env_vars = task.environment_dict
 
         try:
             # Prepare environment
             exec_env = os.environ.copy()
             exec_env.update(env_vars)
 
-            # Execute the script
-            result = subprocess.run(
-                [sys.executable, script_path],
-                capture_output=True,
-                text=True,
-                timeout=task.timeout_seconds,
-                env=exec_env,
-                cwd=tempfile.gettempdir()
-            )
+            if task.execution_mode == 'inproc' and settings.TASKS_ALLOW_INPROC_EXECUTION:
+                # Run inside this worker, sharing its HTTP connection pool
+                result = _run_inproc(
+                    script_content,
+                    env_vars=env_vars,
+                    timeout=task.timeout_seconds
+                )
+            else:
+                # Execute cached bytecode if possible, otherwise pipe the
+                # source to the interpreter's stdin
+                bytecode = _get_cached_bytecode(script_content)
+                if bytecode is not None:
+                    args, stdin_data = [sys.executable, '-c', BYTECODE_LOADER], bytecode
+                else:
+                    args, stdin_data = [sys.executable, '-'], script_content
+                result = _run_script(
+                    args,
+                    stdin_data,
+                    execution_id=execution.id,
+                    timeout=task.timeout_seconds,
+                    env=exec_env,
+                    cwd=tempfile.gettempdir()
+                )
 
             # Determine status based on exit code
             if result.returncode == 0:
@@ -81,11 +180,17 @@ def execute_python_script(self, execution_id):
                 'execution_time_seconds': execution.execution_time_seconds
             }
 
-        except subprocess.TimeoutExpired:
+        except subprocess.TimeoutExpired as e:
             execution.mark_completed(
                 status='timeout',
+                output=e.output or '',
                 error_output=f'Script execution timed out after {task.timeout_seconds} seconds'
             )
+            if isinstance(e, AbandonedScript):
+                # The script is still running in this process and would see
+                # the next task's environment and output; exit so the pool
+                # replaces this worker with a clean one
+                os._exit(1)
             return {
                 'status': 'timeout',
                 'error_output': f'Script execution timed out after {task.timeout_seconds} seconds'
@@ -101,13 +206,6 @@ def execute_python_script(self, execution_id):
                 'error_output': f'Execution error: {str(e)}'
             }
 
-        finally:
-            # Clean up temporary script file
-            try:
-                os.unlink(script_path)
-            except OSError:
-                pass
-
     except TaskExecution.DoesNotExist:
         return {
             'status': 'failure',
@@ -120,6 +218,294 @@ def execute_python_script(self, execution_id):
         }
 
 
+def _bytecode_cache_dir():
+    """
+    Return the bytecode cache directory, creating it private to this user.
+
+    Returns None if the directory cannot be created, is not owned by the
+    worker user, or is accessible to anyone else.
+    """
+    cache_dir = Path(settings.TASKS_BYTECODE_CACHE_DIR)
+    try:
+        cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        stat = cache_dir.stat()
+    except OSError:
+        return None
+    if stat.st_uid != os.getuid() or stat.st_mode & 0o077:
+        return None
+    return cache_dir
+
+
+def _sign_bytecode(data):
+    """HMAC over marshalled bytecode, so planted cache files are rejected."""
+    return salted_hmac('tasks.bytecode', data, algorithm='sha256').digest()
+
+
+def _get_cached_bytecode(script_content):
+    """
+    Return the marshalled bytecode for a script, compiling it on a miss.
+
+    Entries are keyed by the SHA256 of the source and the interpreter's cache
+    tag, so edited scripts and other Python versions never share an entry.
+    Each entry is signed, and only verified bytes are returned; the child
+    receives them over stdin and never opens the cache file itself.
+
+    Returns:
+        bytes: The marshalled code object, or None if the script does not
+            compile or the cache directory cannot be used safely
+    """
+    cache_dir = _bytecode_cache_dir()
+    if cache_dir is None:
+        return None
+
+    digest = hashlib.sha256(script_content.encode()).hexdigest()
+    path = cache_dir / f'{digest}.{sys.implementation.cache_tag}.bin'
+    try:
+        entry = path.read_bytes()
+    except OSError:
+        entry = None
+    if entry is not None:
+        signature, data = entry[:32], entry[32:]
+        if hmac.compare_digest(signature, _sign_bytecode(data)):
+            # Refresh the mtime so prune_bytecode_cache keeps entries in use
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return data
+
+    try:
+        data = marshal.dumps(compile(script_content, '<task>', 'exec', dont_inherit=True))
+    except (SyntaxError, ValueError, MemoryError, RecursionError):
+        # Let the interpreter report the error from the source
+        return None
+
+    try:
+        tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        tmp_path.write_bytes(_sign_bytecode(data) + data)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+    return data
+
+
+def prune_bytecode_cache(max_age_days=BYTECODE_CACHE_MAX_AGE_DAYS):
+    """
+    Delete bytecode cache entries not used in the last max_age_days.
+
+    Returns:
+        int: Number of entries removed
+    """
+    cache_dir = _bytecode_cache_dir()
+    if cache_dir is None:
+        return 0
+
+    cutoff = time.time() - max_age_days * 24 * 60 * 60
+    removed = 0
+    for path in cache_dir.iterdir():
+        if path.suffix not in ('.bin', '.tmp'):
+            continue
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def _run_script(args, stdin_data, execution_id, timeout, env, cwd):
+    """
+    Run the interpreter with stdin_data on stdin, streaming its output.
+
+    stdout and stderr are read as they are produced and appended to the
+    TaskExecution every OUTPUT_FLUSH_INTERVAL seconds, so logs can be tailed
+    while the script runs and a full pipe never stalls the child.
+
+    Returns:
+        subprocess.CompletedProcess: The exit code and the complete output
+
+    Raises:
+        subprocess.TimeoutExpired: If the script runs longer than timeout,
+            carrying the output collected so far
+    """
+    encoding = locale.getpreferredencoding(False)
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    pending = {'output': [], 'error_output': []}
+
+    def flush():
+        updates = {
+            field: Concat(field, Value(''.join(chunks)), output_field=models.TextField())
+            for field, chunks in pending.items()
+            if chunks
+        }
+        if updates:
+            TaskExecution.objects.filter(id=execution_id).update(**updates)
+            for chunks in pending.values():
+                chunks.clear()
+
+    def timed_out():
+        return subprocess.TimeoutExpired(
+            args, timeout, output=stdout.getvalue(), stderr=stderr.getvalue()
+        )
+
+    with subprocess.Popen(
+        args,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+        cwd=cwd
+    ) as proc:
+        try:
+            # The interpreter reads all of stdin before running, so write it up front
+            try:
+                if isinstance(stdin_data, str):
+                    stdin_data = stdin_data.encode(encoding)
+                proc.stdin.write(stdin_data)
+            except BrokenPipeError:
+                pass
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+
+            streams = {
+                proc.stdout: ('output', stdout, codecs.getincrementaldecoder(encoding)('replace')),
+                proc.stderr: ('error_output', stderr, codecs.getincrementaldecoder(encoding)('replace')),
+            }
+            deadline = time.monotonic() + timeout
+            last_flush = time.monotonic()
+
+            with selectors.DefaultSelector() as selector:
+                for stream in streams:
+                    selector.register(stream, selectors.EVENT_READ)
+
+                while selector.get_map():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise timed_out()
+
+                    for key, _ in selector.select(timeout=min(remaining, OUTPUT_FLUSH_INTERVAL)):
+                        field, buffer, decoder = streams[key.fileobj]
+                        data = os.read(key.fd, 65536)
+                        if not data:
+                            selector.unregister(key.fileobj)
+                            text = decoder.decode(b'', final=True)
+                        else:
+                            text = decoder.decode(data)
+                        if text:
+                            buffer.write(text)
+                            pending[field].append(text)
+
+                    if time.monotonic() - last_flush >= OUTPUT_FLUSH_INTERVAL:
+                        flush()
+                        last_flush = time.monotonic()
+
+            # Both pipes hit EOF, so the child has exited or is about to
+            try:
+                returncode = proc.wait(timeout=max(deadline - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                raise timed_out()
+        except BaseException:
+            # Never leave the child running, whatever interrupted us
+            proc.kill()
+            proc.wait()
+            raise
+
+    return subprocess.CompletedProcess(
+        args, returncode, stdout=stdout.getvalue(), stderr=stderr.getvalue()
+    )
+
+
+def _run_inproc(script_content, env_vars, timeout):
+    """
+    Run a script inside the current worker process.
+
+    The script sees a fresh requests.Session as the global ``session``; it
+    is mounted on SHARED_HTTP_ADAPTER, so HTTP calls reuse pooled connections
+    instead of opening new ones on every run. This gives up process isolation
+    and is only used when TASKS_ALLOW_INPROC_EXECUTION is enabled.
+
+    The script runs in its own thread so this thread, which owns the
+    redirected streams and the patched os.environ, can always restore them.
+    On timeout ScriptTimeout is raised in the script thread. A script stuck
+    in a blocking call cannot be interrupted; if it is still running after
+    INPROC_TIMEOUT_GRACE seconds its thread is abandoned, AbandonedScript is
+    raised, and this process refuses further in-process runs. The caller is
+    expected to exit the process once the timeout has been recorded.
+
+    Returns:
+        subprocess.CompletedProcess: The exit code and the captured output
+
+    Raises:
+        subprocess.TimeoutExpired: If the script runs longer than timeout,
+            carrying the output collected so far
+        AbandonedScript: If the script also ignored the timeout
+        RuntimeError: If an earlier script is still running in this process
+    """
+    if any(thread.is_alive() for thread in _abandoned_threads):
+        raise RuntimeError(
+            'An abandoned in-process script is still running in this worker'
+        )
+
+    args = ['<inproc>']
+    stdout, stderr = io.StringIO(), io.StringIO()
+    script_globals = {
+        '__name__': '__main__',
+        '__builtins__': __builtins__,
+        'session': _make_inproc_session(),
+    }
+    result = {'returncode': 0}
+
+    def run():
+        try:
+            try:
+                exec(compile(script_content, '<task>', 'exec'), script_globals)
+            except SystemExit as e:
+                if isinstance(e.code, int):
+                    result['returncode'] = e.code
+                elif e.code is not None:
+                    print(e.code, file=stderr)
+                    result['returncode'] = 1
+            except ScriptTimeout:
+                raise
+            except BaseException:
+                traceback.print_exc(file=stderr)
+                result['returncode'] = 1
+        except ScriptTimeout:
+            # Delivered after timing out; the caller reports it
+            pass
+
+    saved_environ = os.environ.copy()
+    os.environ.update(env_vars)
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            thread = threading.Thread(target=run, name='inproc-task', daemon=True)
+            thread.start()
+            thread.join(timeout)
+            if thread.is_alive():
+                ctypes.pythonapi.PyThreadState_SetAsyncExc(
+                    ctypes.c_ulong(thread.ident), ctypes.py_object(ScriptTimeout)
+                )
+                thread.join(INPROC_TIMEOUT_GRACE)
+                error = subprocess.TimeoutExpired
+                if thread.is_alive():
+                    _abandoned_threads.append(thread)
+                    error = AbandonedScript
+                raise error(
+                    args, timeout, output=stdout.getvalue(), stderr=stderr.getvalue()
+                )
+    finally:
+        os.environ.clear()
+        os.environ.update(saved_environ)
+
+    return subprocess.CompletedProcess(
+        args, result['returncode'], stdout=stdout.getvalue(), stderr=stderr.getvalue()
+    )
+
+
 @shared_task
 def schedule_periodic_tasks():
     """
@@ -131,23 +517,46 @@ def schedule_periodic_tasks():
     now = timezone.now()
 
     # Find tasks that are due for execution
-    due_tasks = TaskDefinition.objects.filter(
-        status='active',
-        next_run_at__lte=now
+    due_tasks = list(
+        TaskDefinition.objects.filter(
+            status='active',
+            next_run_at__lte=now
+        ).only('id', 'user', 'schedule_type', 'schedule_value')
     )
+    if not due_tasks:
+        return
+
+    # Pre-assign Celery task IDs so each execution is written only once, and
+    # commit the rows before dispatch so workers can see them
+    executions = [
+        TaskExecution(task=task, celery_task_id=uuid()) for task in due_tasks
+    ]
+    TaskExecution.objects.bulk_create(executions)
+
+    # Only advance tasks that were actually queued; the rest are retried on
+    # the next tick
+    queued_tasks = []
+    for task, execution in zip(due_tasks, executions):
+        try:
+            execute_python_script.apply_async(
+                args=[execution.id],
+                task_id=execution.celery_task_id
+            )
+        except Exception as e:
+            execution.mark_completed(
+                'failure',
+                error_output=f'Failed to queue task: {str(e)}'
+            )
+            continue
+        task.next_run_at = calculate_next_run_time(task)
+        queued_tasks.append(task)
 
-    for task in due_tasks:
-        # Create a new execution
-        execution = TaskExecution.objects.create(task=task)
-
-        # Queue for execution
-        result = execute_python_script.delay(execution.id)
-        execution.celery_task_id = result.id
-        execution.save(update_fields=['celery_task_id'])
+    if queued_tasks:
+        TaskDefinition.objects.bulk_update(queued_tasks, ['next_run_at'])
 
-        # Update next run time based on schedule
-        task.next_run_at = calculate_next_run_time(task)
-        task.save(update_fields=['next_run_at'])
+    # Bulk writes skip save(), so drop the owners' cached stats here
+    for user_id in {task.user_id for task in due_tasks}:
+        invalidate_dashboard_stats(user_id)
 
 
 def calculate_next_run_time(task):
@@ -160,8 +569,7 @@ def calculate_next_run_time(task):
     Returns:
         datetime: Next scheduled run time, or None if task shouldn't repeat
     """
-    import re
-    from datetime import timedelta
+    from datetime import datetime, timedelta
 
     now = timezone.now()
 
@@ -176,10 +584,11 @@ def calculate_next_run_time(task):
             return None
 
     elif task.schedule_type == 'cron':
-        # For cron expressions, we'd need a more sophisticated library
-        # like croniter. For now, return a default interval
-        # TODO: Implement proper cron parsing
-        return now + timedelta(hours=1)
+        # Evaluate the expression in the project's local time zone
+        try:
+            return croniter(task.schedule_value, timezone.localtime(now)).get_next(datetime)
+        except CroniterError:
+            return None
 
     return None
 
@@ -194,9 +603,48 @@ def cleanup_old_executions():
 
     cutoff_date = timezone.now() - timedelta(days=30)
 
-    # Delete old execution records
-    deleted_count = TaskExecution.objects.filter(
-        created_at__lt=cutoff_date
-    ).delete()[0]
+    # Delete old execution records in batches so each DELETE holds its locks briefly
+    deleted_count = 0
+    while True:
+        batch_ids = list(
+            TaskExecution.objects.filter(
+                created_at__lt=cutoff_date
+            ).values_list('pk', flat=True)[:CLEANUP_BATCH_SIZE]
+        )
+        if not batch_ids:
+            break
+        deleted_count += TaskExecution.objects.filter(pk__in=batch_ids).delete()[0]
+
+    # Drop compiled scripts that have not run recently
+    pruned_count = prune_bytecode_cache()
+
+    return (
+        f"Cleaned up {deleted_count} old execution records "
+        f"and {pruned_count} cached bytecode files"
+    )
+
+
+@shared_task
+def reconcile_running_counts():
+    """
+    Reset TaskDefinition.running_runs from the executions actually running.
+
+    The counter is incremented in mark_started and decremented in
+    mark_completed, so a worker killed in between leaves it inflated. Run
+    this periodically (e.g. every few minutes) from Celery Beat.
+    """
+    from .models import TaskDefinition
+
+    running = TaskExecution.objects.filter(
+        task=OuterRef('pk'),
+        status='running'
+    ).values('task').annotate(count=Count('pk')).values('count')
+
+    running_task_ids = TaskExecution.objects.filter(status='running').values('task')
+    updated_count = TaskDefinition.objects.filter(
+        Q(running_runs__gt=0) | Q(pk__in=running_task_ids)
+    ).update(
+        running_runs=Coalesce(Subquery(running), 0)
+    )
 
-    return f"Cleaned up {deleted_count} old execution records"
+    return f"Reconciled running counts for {updated_count} tasks"
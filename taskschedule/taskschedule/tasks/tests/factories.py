@@ -0,0 +1,23 @@
+from factory import Faker
+from factory import SubFactory
+from factory.django import DjangoModelFactory
+
+from taskschedule.tasks.models import TaskDefinition
+from taskschedule.tasks.models import TaskExecution
+from taskschedule.users.tests.factories import UserFactory
+
+
+class TaskDefinitionFactory(DjangoModelFactory[TaskDefinition]):
+    user = SubFactory(UserFactory)
+    name = Faker("sentence", nb_words=3)
+    script_content = "print('hello')"
+
+    class Meta:
+        model = TaskDefinition
+
+
+class TaskExecutionFactory(DjangoModelFactory[TaskExecution]):
+    task = SubFactory(TaskDefinitionFactory)
+
+    class Meta:
+        model = TaskExecution
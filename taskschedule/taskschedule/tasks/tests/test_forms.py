@@ -0,0 +1,49 @@
+from taskschedule.tasks.forms import TaskSubmissionForm
+
+
+def _form(schedule_type, schedule_value):
+    return TaskSubmissionForm(
+        {
+            "name": "Nightly report",
+            "task_type": "scheduled",
+            "script_content": "print('hello')",
+            "schedule_type": schedule_type,
+            "schedule_value": schedule_value,
+        },
+    )
+
+
+class TestTaskSubmissionForm:
+    def test_valid_cron_expression(self):
+        form = _form("cron", "0 9 * * 1-5")
+
+        assert form.is_valid()
+
+    def test_cron_expression_with_steps_and_lists(self):
+        form = _form("cron", "*/15 0,12 * * *")
+
+        assert form.is_valid()
+
+    def test_cron_expression_out_of_range(self):
+        form = _form("cron", "61 * * * *")
+
+        assert not form.is_valid()
+        assert "schedule_value" in form.errors
+
+    def test_cron_expression_wrong_field_count(self):
+        form = _form("cron", "0 9 * *")
+
+        assert not form.is_valid()
+        assert "schedule_value" in form.errors
+
+    def test_cron_expression_that_never_fires(self):
+        form = _form("cron", "0 0 31 2 *")
+
+        assert not form.is_valid()
+        assert "schedule_value" in form.errors
+
+    def test_interval_must_be_positive(self):
+        form = _form("interval", "0")
+
+        assert not form.is_valid()
+        assert "schedule_value" in form.errors
@@ -0,0 +1,70 @@
+import pytest
+
+from taskschedule.tasks.models import TaskDefinition
+from taskschedule.tasks.tests.factories import TaskExecutionFactory
+
+
+class TestEnvironmentDict:
+    def test_empty(self):
+        assert TaskDefinition(environment_variables="").environment_dict == {}
+
+    def test_parses_lines(self):
+        task = TaskDefinition(
+            environment_variables="API_KEY = abc\r\n\nNO_EQUALS\nURL=http://x/?a=1\n",
+        )
+
+        assert task.environment_dict == {"API_KEY": "abc", "URL": "http://x/?a=1"}
+
+
+@pytest.mark.django_db
+class TestTaskExecutionCounters:
+    def test_mark_started_and_completed(self):
+        execution = TaskExecutionFactory()
+        task = execution.task
+
+        execution.mark_started()
+        task.refresh_from_db()
+        assert task.running_runs == 1
+
+        execution.mark_completed("success", output="done", exit_code=0)
+        task.refresh_from_db()
+        execution.refresh_from_db()
+        assert task.running_runs == 0
+        assert task.total_runs == 1
+        assert task.successful_runs == 1
+        assert task.failed_runs == 0
+        assert task.last_run_at == execution.completed_at
+        assert execution.status == "success"
+        assert execution.output == "done"
+
+    def test_failure_is_counted(self):
+        execution = TaskExecutionFactory()
+        task = execution.task
+
+        execution.mark_started()
+        execution.mark_completed("failure", error_output="boom", exit_code=1)
+        task.refresh_from_db()
+        assert task.running_runs == 0
+        assert task.failed_runs == 1
+        assert task.successful_runs == 0
+
+    def test_completion_after_reconcile_does_not_go_negative(self):
+        execution = TaskExecutionFactory()
+        task = execution.task
+
+        execution.mark_started()
+        TaskDefinition.objects.filter(pk=task.pk).update(running_runs=0)
+        execution.mark_completed("success", exit_code=0)
+
+        task.refresh_from_db()
+        assert task.running_runs == 0
+        assert task.successful_runs == 1
+
+    def test_completing_unstarted_execution_keeps_running_count(self):
+        execution = TaskExecutionFactory()
+        task = execution.task
+
+        execution.mark_completed("failure", error_output="could not queue")
+        task.refresh_from_db()
+        assert task.running_runs == 0
+        assert task.failed_runs == 1
@@ -0,0 +1,343 @@
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from taskschedule.tasks import tasks
+from taskschedule.tasks.models import TaskDefinition
+from taskschedule.tasks.tasks import _get_cached_bytecode
+from taskschedule.tasks.tasks import _run_inproc
+from taskschedule.tasks.tasks import _run_script
+from taskschedule.tasks.tasks import calculate_next_run_time
+from taskschedule.tasks.tasks import execute_python_script
+from taskschedule.tasks.tasks import prune_bytecode_cache
+from taskschedule.tasks.tasks import reconcile_running_counts
+from taskschedule.tasks.tasks import schedule_periodic_tasks
+from taskschedule.tasks.tests.factories import TaskDefinitionFactory
+from taskschedule.tasks.tests.factories import TaskExecutionFactory
+
+
+class TestCalculateNextRunTime:
+    def test_once_does_not_repeat(self):
+        task = TaskDefinition(schedule_type="once")
+
+        assert calculate_next_run_time(task) is None
+
+    def test_interval(self):
+        task = TaskDefinition(schedule_type="interval", schedule_value="300")
+        before = timezone.now()
+
+        next_run = calculate_next_run_time(task)
+
+        assert before + timedelta(seconds=300) <= next_run
+        assert next_run <= timezone.now() + timedelta(seconds=300)
+
+    def test_cron(self):
+        task = TaskDefinition(schedule_type="cron", schedule_value="30 9 * * *")
+        now = timezone.now()
+
+        next_run = calculate_next_run_time(task)
+
+        assert now < next_run <= now + timedelta(days=1)
+        assert (next_run.hour, next_run.minute, next_run.second) == (9, 30, 0)
+
+    def test_invalid_cron(self):
+        task = TaskDefinition(schedule_type="cron", schedule_value="not a cron")
+
+        assert calculate_next_run_time(task) is None
+
+    def test_cron_that_never_fires(self):
+        task = TaskDefinition(schedule_type="cron", schedule_value="0 0 31 2 *")
+
+        assert calculate_next_run_time(task) is None
+
+
+@pytest.mark.django_db
+class TestSchedulePeriodicTasks:
+    @pytest.fixture
+    def due_tasks(self):
+        past = timezone.now() - timedelta(minutes=1)
+        return TaskDefinitionFactory.create_batch(
+            2,
+            status="active",
+            schedule_type="interval",
+            schedule_value="60",
+            next_run_at=past,
+        )
+
+    @pytest.fixture
+    def queued(self, monkeypatch):
+        calls = []
+
+        def apply_async(args, task_id):
+            calls.append((args[0], task_id))
+
+        monkeypatch.setattr(tasks.execute_python_script, "apply_async", apply_async)
+        return calls
+
+    def test_queues_due_tasks(self, due_tasks, queued):
+        now = timezone.now()
+
+        schedule_periodic_tasks()
+
+        for task in due_tasks:
+            task.refresh_from_db()
+            execution = task.executions.get()
+            assert (execution.id, execution.celery_task_id) in queued
+            assert execution.status == "pending"
+            assert task.next_run_at > now
+        assert len(queued) == len(due_tasks)
+
+    def test_dispatch_failure_keeps_task_due(self, due_tasks, monkeypatch):
+        failing, ok = due_tasks
+        queued = []
+
+        def apply_async(args, task_id):
+            if args[0] == failing.executions.get().id:
+                msg = "broker unavailable"
+                raise ConnectionError(msg)
+            queued.append(args[0])
+
+        monkeypatch.setattr(tasks.execute_python_script, "apply_async", apply_async)
+        due_at = failing.next_run_at
+
+        schedule_periodic_tasks()
+
+        failing.refresh_from_db()
+        ok.refresh_from_db()
+        failed_execution = failing.executions.get()
+        assert failing.next_run_at == due_at
+        assert failed_execution.status == "failure"
+        assert "broker unavailable" in failed_execution.error_output
+        assert queued == [ok.executions.get().id]
+        assert ok.next_run_at > due_at
+
+    def test_ignores_tasks_not_due(self, queued):
+        TaskDefinitionFactory(
+            status="active",
+            next_run_at=timezone.now() + timedelta(hours=1),
+        )
+        TaskDefinitionFactory(status="paused", next_run_at=timezone.now())
+
+        schedule_periodic_tasks()
+
+        assert queued == []
+
+
+@pytest.mark.django_db
+class TestReconcileRunningCounts:
+    def test_resets_inflated_counter(self):
+        task = TaskDefinitionFactory(running_runs=3)
+        TaskExecutionFactory(task=task, status="running")
+        TaskExecutionFactory(task=task, status="success")
+
+        reconcile_running_counts()
+
+        task.refresh_from_db()
+        assert task.running_runs == 1
+
+    def test_clears_counter_without_running_executions(self):
+        task = TaskDefinitionFactory(running_runs=2)
+
+        reconcile_running_counts()
+
+        task.refresh_from_db()
+        assert task.running_runs == 0
+
+
+@pytest.mark.django_db
+class TestRunScript:
+    @pytest.fixture
+    def execution(self):
+        return TaskExecutionFactory()
+
+    def _run(self, execution, script, timeout=10):
+        return _run_script(
+            [sys.executable, "-"],
+            script,
+            execution_id=execution.id,
+            timeout=timeout,
+            env=None,
+            cwd=tempfile.gettempdir(),
+        )
+
+    def test_large_output(self, execution):
+        script = (
+            "import sys\n"
+            "sys.stdout.write('x' * 200000)\n"
+            "sys.stderr.write('y' * 100000)\n"
+        )
+
+        result = self._run(execution, script)
+
+        assert result.returncode == 0
+        assert result.stdout == "x" * 200000
+        assert result.stderr == "y" * 100000
+
+    def test_non_zero_exit_code(self, execution):
+        exit_code = 3
+        script = f"import sys\nprint('partial')\nsys.exit({exit_code})\n"
+
+        result = self._run(execution, script)
+
+        assert result.returncode == exit_code
+        assert result.stdout == "partial\n"
+
+    def test_timeout_keeps_partial_output(self, execution):
+        script = "import time\nprint('started', flush=True)\ntime.sleep(30)\n"
+
+        with pytest.raises(subprocess.TimeoutExpired) as exc_info:
+            self._run(execution, script, timeout=1)
+
+        assert exc_info.value.output == "started\n"
+
+    def test_output_is_streamed_to_execution(self, execution, monkeypatch):
+        monkeypatch.setattr(tasks, "OUTPUT_FLUSH_INTERVAL", 0.1)
+        script = "import time\nprint('first', flush=True)\ntime.sleep(0.5)\n"
+
+        self._run(execution, script)
+
+        execution.refresh_from_db()
+        assert execution.output == "first\n"
+
+
+class TestRunInproc:
+    def test_output_and_exit_code(self):
+        exit_code = 2
+        script = (
+            f"import os, sys\nprint(os.environ['GREETING'])\nsys.exit({exit_code})\n"
+        )
+
+        result = _run_inproc(script, env_vars={"GREETING": "hello"}, timeout=5)
+
+        assert result.returncode == exit_code
+        assert result.stdout == "hello\n"
+        assert "GREETING" not in os.environ
+        assert sys.stdout is sys.__stdout__
+
+    def test_exception_is_reported(self):
+        result = _run_inproc("raise ValueError('boom')", env_vars={}, timeout=5)
+
+        assert result.returncode == 1
+        assert "ValueError: boom" in result.stderr
+
+    def test_session_state_is_not_shared(self):
+        leak = "session.headers['Authorization'] = 'secret'"
+        check = "print('Authorization' in session.headers)"
+        _run_inproc(leak, env_vars={}, timeout=5)
+
+        result = _run_inproc(check, env_vars={}, timeout=5)
+
+        assert result.stdout == "False\n"
+
+    def test_timeout_restores_worker_state(self):
+        script = "print('started')\nwhile True:\n    pass\n"
+
+        with pytest.raises(subprocess.TimeoutExpired) as exc_info:
+            _run_inproc(script, env_vars={"LEAK": "1"}, timeout=1)
+
+        assert exc_info.value.output == "started\n"
+        assert "LEAK" not in os.environ
+        assert sys.stdout is sys.__stdout__
+
+    def test_stuck_script_blocks_further_runs(self, monkeypatch):
+        monkeypatch.setattr(tasks, "INPROC_TIMEOUT_GRACE", 0.1)
+        monkeypatch.setattr(tasks, "_abandoned_threads", [])
+
+        with pytest.raises(tasks.AbandonedScript):
+            _run_inproc("import time\ntime.sleep(3)\n", env_vars={}, timeout=0.5)
+
+        with pytest.raises(RuntimeError, match="abandoned"):
+            _run_inproc("print('next')", env_vars={}, timeout=5)
+
+
+@pytest.mark.django_db
+class TestExecutePythonScript:
+    def test_abandoned_script_exits_worker(self, settings, monkeypatch):
+        settings.TASKS_ALLOW_INPROC_EXECUTION = True
+        execution = TaskExecutionFactory(task__execution_mode="inproc")
+        exits = []
+
+        def run_inproc(script_content, env_vars, timeout):
+            raise tasks.AbandonedScript(["<inproc>"], timeout, output="partial")
+
+        monkeypatch.setattr(tasks, "_run_inproc", run_inproc)
+        monkeypatch.setattr(tasks.os, "_exit", exits.append)
+
+        execute_python_script(execution.id)
+
+        execution.refresh_from_db()
+        assert execution.status == "timeout"
+        assert execution.output == "partial"
+        assert exits == [1]
+
+
+class TestBytecodeCache:
+    @pytest.fixture
+    def cache_dir(self, settings, tmp_path):
+        settings.TASKS_BYTECODE_CACHE_DIR = str(tmp_path / "bytecode")
+        return tmp_path / "bytecode"
+
+    def test_cached_bytecode_runs(self, cache_dir):
+        bytecode = _get_cached_bytecode("print('hello')")
+
+        result = subprocess.run(  # noqa: S603
+            [sys.executable, "-c", tasks.BYTECODE_LOADER],
+            input=bytecode,
+            capture_output=True,
+            check=True,
+        )
+        assert result.stdout == b"hello\n"
+        assert _get_cached_bytecode("print('hello')") == bytecode
+        assert len(list(cache_dir.iterdir())) == 1
+
+    def test_script_runs_as_main(self, cache_dir):
+        script = (
+            "import pickle, sys\n"
+            "class Point:\n"
+            "    pass\n"
+            "def f():\n"
+            "    pass\n"
+            "pickle.dumps(f)\n"
+            "pickle.dumps(Point())\n"
+            "print(sys.argv, 'code' in globals(), 'marshal' in globals())\n"
+        )
+
+        result = subprocess.run(  # noqa: S603
+            [sys.executable, "-c", tasks.BYTECODE_LOADER],
+            input=_get_cached_bytecode(script),
+            capture_output=True,
+            check=True,
+        )
+
+        assert result.stdout == b"['-'] False False\n"
+
+    def test_tampered_entry_is_replaced(self, cache_dir):
+        bytecode = _get_cached_bytecode("print('hello')")
+        (entry,) = cache_dir.iterdir()
+        entry.write_bytes(b"\0" * 32 + b"planted")
+
+        assert _get_cached_bytecode("print('hello')") == bytecode
+
+    def test_shared_directory_is_not_used(self, cache_dir):
+        cache_dir.mkdir(mode=0o777)
+        cache_dir.chmod(0o777)
+
+        assert _get_cached_bytecode("print('hello')") is None
+
+    def test_uncompilable_script_falls_back_to_source(self, cache_dir):
+        assert _get_cached_bytecode("def broken(:") is None
+        assert _get_cached_bytecode("x=" + "-" * 200000 + "1") is None
+
+    def test_prune_removes_stale_entries(self, cache_dir):
+        _get_cached_bytecode("print('old')")
+        (entry,) = cache_dir.iterdir()
+        os.utime(entry, (0, 0))
+        _get_cached_bytecode("print('new')")
+
+        assert prune_bytecode_cache() == 1
+        assert len(list(cache_dir.iterdir())) == 1
@@ -1,14 +1,18 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.db.models import Count, Q
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.decorators.http import require_http_methods
 from django.views.generic import DetailView
 
 from taskschedule.tasks.forms import (TaskExecuteForm, TaskSubmissionForm,
                                       TaskUpdateForm)
-from taskschedule.tasks.models import TaskDefinition, TaskExecution
+from taskschedule.tasks.models import (DASHBOARD_STATS_TIMEOUT,
+                                       TaskDefinition, TaskExecution,
+                                       dashboard_stats_cache_key)
 from taskschedule.tasks.tasks import execute_python_script
 
 
@@ -45,7 +49,11 @@ def home_view(request):
 @login_required
 def dashboard_view(request):
     """User dashboard showing all their tasks."""
-    tasks = TaskDefinition.objects.filter(user=request.user)
+    # Only load the columns the task list renders
+    tasks = TaskDefinition.objects.filter(user=request.user).only(
+        'id', 'name', 'description', 'task_type', 'status',
+        'schedule_type', 'created_at'
+    )
 
     # Filter by status if requested
     status_filter = request.GET.get('status')
@@ -57,24 +65,35 @@ def dashboard_view(request):
     if type_filter:
         tasks = tasks.filter(task_type=type_filter)
 
+    # Count executions per task in the page query instead of once per row
+    tasks = tasks.annotate(execution_count=Count('executions'))
+
     # Pagination
     paginator = Paginator(tasks, 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
-    # Statistics
-    stats = {
-        'total_tasks': TaskDefinition.objects.filter(user=request.user).count(),
-        'active_tasks': TaskDefinition.objects.filter(
-            user=request.user, status='active'
-        ).count(),
-        'total_executions': TaskExecution.objects.filter(
+    # Statistics, cached until the user's tasks or executions change
+    stats_key = dashboard_stats_cache_key(request.user.id)
+    stats = cache.get(stats_key)
+    if stats is None:
+        task_stats = TaskDefinition.objects.filter(user=request.user).aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(status='active')),
+        )
+        execution_stats = TaskExecution.objects.filter(
             task__user=request.user
-        ).count(),
-        'successful_executions': TaskExecution.objects.filter(
-            task__user=request.user, status='success'
-        ).count(),
-    }
+        ).aggregate(
+            total=Count('id'),
+            successful=Count('id', filter=Q(status='success')),
+        )
+        stats = {
+            'total_tasks': task_stats['total'],
+            'active_tasks': task_stats['active'],
+            'total_executions': execution_stats['total'],
+            'successful_executions': execution_stats['successful'],
+        }
+        cache.set(stats_key, stats, DASHBOARD_STATS_TIMEOUT)
 
     return render(request, 'tasks/dashboard.html', {
         'page_obj': page_obj,
@@ -95,18 +114,18 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        task = self.get_object()
+        task = context['task']
 
-        # Get recent executions
-        recent_executions = task.executions.all()[:10]
+        # Get recent executions, leaving the potentially large output columns unloaded
+        recent_executions = task.executions.defer('output', 'error_output')[:10]
         context['recent_executions'] = recent_executions
 
         # Add execute form
         context['execute_form'] = TaskExecuteForm()
 
         # Add execution statistics
-        context['successful_count'] = task.executions.filter(status='success').count()
-        context['failed_count'] = task.executions.filter(status='failed').count()
+        context['successful_count'] = task.successful_runs
+        context['failed_count'] = task.failed_runs
 
         return context
 
@@ -199,23 +218,18 @@ def execution_logs_view(request, pk):
     """View execution logs for a specific task."""
     task = get_object_or_404(TaskDefinition, pk=pk, user=request.user)
 
-    # Get all executions for this task
-    executions = task.executions.all().order_by('-created_at')
+    # Get all executions for this task; the list does not render their output
+    executions = task.executions.order_by('-created_at').defer('output', 'error_output')
 
     # Pagination
     paginator = Paginator(executions, 20)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
-    # Statistics
-    successful_count = task.executions.filter(status='success').count()
-    failed_count = task.executions.filter(status='failed').count()
-    running_count = task.executions.filter(status='running').count()
-
     return render(request, 'tasks/execution_logs.html', {
         'task': task,
         'page_obj': page_obj,
-        'successful_count': successful_count,
-        'failed_count': failed_count,
-        'running_count': running_count,
+        'successful_count': task.successful_runs,
+        'failed_count': task.failed_runs,
+        'running_count': task.running_runs,
     })